@@ -5,15 +5,26 @@
 - 명도 대비 강화, 색약 사용자 고려(Okabe–Ito 기반 팔레트)
 - 색상 + 패턴/마커/선스타일 병행
 - kaleido 미설치 환경에서도 정상 구동 (PNG 저장은 선택)
+- numba 설치 시 누적/단위 파생 컬럼을 단일 JIT 루프로 계산 (미설치 시 NumPy)
 """
 import io
-from datetime import datetime
 
 import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 import streamlit as st
 
+try:
+    import pyarrow.csv as pacsv  # streamlit 설치 시 함께 제공
+except ImportError:
+    pacsv = None
+
+try:
+    from numba import njit
+except ImportError:  # numba는 선택 의존성
+    njit = None
+
 # ----------------------------------------------------
 # 0) 페이지 & 공통 스타일
 # ----------------------------------------------------
@@ -42,6 +53,8 @@ def _style_metric_label(label: str) -> str:
 st.markdown(
     """
     <style>
+      .metric-row { display:flex; flex-wrap:wrap; gap:12px; }
+      .metric-row > .metric-card { flex:1 1 200px; }
       .metric-card { background-color:#F5F7FA; padding:16px 18px; border-radius:14px; border:1px solid #E3E8EF; }
       .metric-value { font-size:22px; font-weight:700; color:#2B2B2B; }
       .metric-delta-pos { color:#009E73; font-weight:600; }
@@ -76,9 +89,26 @@ use_brand_primary = st.sidebar.toggle("브랜드 네이비를 본선 색으로 
 # ----------------------------------------------------
 # 2) 데이터 로드/전처리
 # ----------------------------------------------------
-def load_data(file) -> pd.DataFrame:
-    if file is not None:
-        df = pd.read_csv(file)
+# 명시 스키마 → Arrow CSV 리더가 타입 추론 없이 멀티스레드 파싱
+_CSV_DTYPES = {"월": "string", "매출액": "float64", "전년동월": "float64", "증감률": "string"}
+
+def _read_csv(raw_bytes: bytes) -> pd.DataFrame:
+    if pacsv is not None:
+        try:
+            table = pacsv.read_csv(io.BytesIO(raw_bytes),
+                                   convert_options=pacsv.ConvertOptions(column_types=_CSV_DTYPES))
+            # split_blocks: 컬럼별 블록 유지(통합 복사 없음) + self_destruct: 변환하면서 Arrow 버퍼 해제
+            # → 두 옵션을 함께 써야 피크 메모리가 실제로 줄어듦
+            return table.to_pandas(split_blocks=True, self_destruct=True)
+        except ValueError:
+            pass  # 숫자 컬럼에 문자 포함 → 기본 파서 (아래 to_numeric에서 결측 처리)
+    return pd.read_csv(io.BytesIO(raw_bytes))
+
+@st.cache_data(show_spinner=False)
+def _parse_csv(raw_bytes: bytes | None) -> pd.DataFrame:
+    """업로드 바이트 → 정제된 원본 프레임 (단위 환산 전). 같은 파일이면 캐시 재사용."""
+    if raw_bytes is not None:
+        df = _read_csv(raw_bytes)
     else:
         # 샘플 (업로드 없을 때)
         df = pd.DataFrame({
@@ -93,23 +123,78 @@ def load_data(file) -> pd.DataFrame:
         if c not in df.columns:
             raise ValueError(f"필수 컬럼 누락: {c}")
 
-    # 정제
-    df = df.copy()
+    # 정제 (read_csv/샘플 모두 새 프레임이므로 별도 copy 불필요)
     df["월"] = df["월"].astype(str).str.strip()
     df["매출액"] = pd.to_numeric(df["매출액"], errors="coerce")
     df["전년동월"] = pd.to_numeric(df["전년동월"], errors="coerce")
     df["증감률"] = pd.to_numeric(df["증감률"].astype(str).str.replace("%", "", regex=False), errors="coerce")
     df = df.dropna(subset=["월", "매출액", "전년동월", "증감률"]).sort_values("월").reset_index(drop=True)
-
-    # 파생
-    df["매출액_단위"]   = df["매출액"] / unit_div
-    df["전년동월_단위"] = df["전년동월"] / unit_div
-    df["누적매출"]      = df["매출액"].cumsum()
-    df["누적매출_단위"] = df["누적매출"] / unit_div
+    # 히트맵용 연/월 정수 (YYYY-MM 1회 파싱). 형식이 다른 월은 <NA> → 히트맵에서만 제외
+    p = pd.to_datetime(df["월"], format="%Y-%m", errors="coerce")
+    df["연"] = p.dt.year.astype("Int16")
+    df["월번호"] = p.dt.month.astype("Int8")
     return df
 
+def _derive_cols_np(sales, prev, unit_div):
+    cum = np.cumsum(sales)
+    return cum, sales / unit_div, prev / unit_div, cum / unit_div
+
+if njit is not None:
+    # 디스크 캐시(cache=True)는 쓰지 않음: 읽기 전용 환경에서 데코레이터가 RuntimeError로 기동을 막고,
+    # _derive가 이미 st.cache_data로 메모이즈되어 JIT 컴파일은 프로세스당 1회뿐
+    @njit
+    def _derive_cols(sales, prev, unit_div):
+        # 누적합 + 단위 환산 3종을 메모리 1회 순회로 계산
+        n = sales.size
+        cum = np.empty(n)
+        sales_u = np.empty(n)
+        prev_u = np.empty(n)
+        cum_u = np.empty(n)
+        acc = 0.0
+        for i in range(n):
+            acc += sales[i]
+            cum[i] = acc
+            sales_u[i] = sales[i] / unit_div
+            prev_u[i] = prev[i] / unit_div
+            cum_u[i] = acc / unit_div
+        return cum, sales_u, prev_u, cum_u
+else:
+    _derive_cols = _derive_cols_np
+
+# float32가 정수를 정확히 표현하는 한계 (이상이면 라벨/호버 금액이 어긋남)
+_FLOAT32_EXACT = 2**24
+
+def _downcast_display(*cols):
+    peak = max((np.abs(c).max() for c in cols if c.size), default=0.0)
+    if peak < _FLOAT32_EXACT:
+        return tuple(c.astype(np.float32) for c in cols)
+    return cols
+
+@st.cache_data(show_spinner=False)
+def _derive(df: pd.DataFrame, unit_div: int) -> pd.DataFrame:
+    """누적매출 + 표시 단위(_단위) 파생 컬럼 추가. 단위 변경 시에만 재계산.
+    차트 전용 컬럼은 값이 2**24 미만일 때만 float32로 내려 Plotly 페이로드를 줄임
+    (plotly>=6의 base64 typed array 직렬화 기준 — 5.x의 tolist()에서는 오히려 커짐)
+    (원 단위처럼 큰 값은 float64 유지, KPI는 원본 컬럼 사용)."""
+    cum, sales_u, prev_u, cum_u = _derive_cols(
+        df["매출액"].to_numpy(dtype=np.float64), df["전년동월"].to_numpy(dtype=np.float64), unit_div)
+    sales_u, prev_u, cum_u = _downcast_display(sales_u, prev_u, cum_u)
+    return df.assign(누적매출=cum, 매출액_단위=sales_u, 전년동월_단위=prev_u, 누적매출_단위=cum_u)
+
+def _sales_stats(df: pd.DataFrame) -> dict:
+    """매출액 최대/최소/평균/누적 — KPI와 추세 차트가 공유 (NumPy 1회 순회)."""
+    arr = df["매출액"].to_numpy()
+    argmax = int(arr.argmax())
+    argmin = int(arr.argmin())
+    return {
+        "argmax": argmax, "argmin": argmin,
+        "max": arr[argmax], "min": arr[argmin],
+        "mean": arr.mean(), "cum_last": df["누적매출"].iat[-1],
+    }
+
 try:
-    df = load_data(uploaded)
+    raw_bytes = uploaded.getvalue() if uploaded is not None else None
+    df = _derive(_parse_csv(raw_bytes), unit_div)
     has_data = True
 except Exception as e:
     has_data = False
@@ -130,41 +215,73 @@ st.markdown(
 if not has_data:
     st.stop()
 
-max_sales = df["매출액"].max()
-avg_sales = df["매출액"].mean()
-avg_rate  = df["증감률"].replace([np.inf, -np.inf], np.nan).fillna(0).mean()
-cum_last  = df["누적매출"].iloc[-1]
-goal_pct  = (cum_last / goal * 100) if goal > 0 else np.nan
-
-c1, c2, c3, c4 = st.columns(4)
-with c1:
-    st.markdown(f"<div class='metric-card'>{_style_metric_label('최고 매출')}<div class='metric-value'>{max_sales/unit_div:,.1f} {unit_name}</div></div>", unsafe_allow_html=True)
-with c2:
-    st.markdown(f"<div class='metric-card'>{_style_metric_label('평균 매출')}<div class='metric-value'>{avg_sales/unit_div:,.1f} {unit_name}</div></div>", unsafe_allow_html=True)
-with c3:
-    delta_cls = "metric-delta-pos" if avg_rate >= 0 else "metric-delta-neg"
-    st.markdown(f"<div class='metric-card'>{_style_metric_label('평균 증감률')}<div class='metric-value'><span class='{delta_cls}'>{avg_rate:.1f}%</span></div></div>", unsafe_allow_html=True)
-with c4:
-    attain_rate = 100 * cum_last / goal if goal else 0
+@st.cache_data(show_spinner=False)
+def compute_kpis(df: pd.DataFrame, unit_div: int, goal_scaled: float) -> dict:
+    stats = _sales_stats(df)
+    cum_last = stats["cum_last"] / unit_div
+    # ±inf/NaN → 0 으로 본 평균 (중간 Series 없이 버퍼 1개)
+    arr_r = df["증감률"].to_numpy()
+    avg_rate = float(np.where(np.isfinite(arr_r), arr_r, 0.0).mean())
+    return {
+        "max_sales": stats["max"] / unit_div,
+        "avg_sales": stats["mean"] / unit_div,
+        "avg_rate": avg_rate,
+        "cum_last": cum_last,
+        "goal": goal_scaled,
+        "attain_rate": 100 * cum_last / goal_scaled if goal_scaled else 0,
+    }
+
+@st.cache_data(show_spinner=False)
+def render_kpi_html(kpis: dict, unit_name: str) -> str:
+    """KPI 카드 4장을 한 줄 flex 컨테이너 HTML로 (값이 같으면 문자열 재사용)."""
+    delta_cls = "metric-delta-pos" if kpis["avg_rate"] >= 0 else "metric-delta-neg"
+    attain_rate = kpis["attain_rate"]
     color_cls = "metric-delta-pos" if attain_rate >= 100 else "metric-delta-neg" if attain_rate < 80 else ""
-    st.markdown(
-        f"<div class='metric-card'>{_style_metric_label('누적/목표')}<div class='metric-value'>{cum_last/unit_div:,.1f} / {goal/unit_div:,.1f} {unit_name} <span class='{color_cls}' style='font-size:16px;'>({attain_rate:.1f}%)</span></div></div>",
-        unsafe_allow_html=True
+    cards = (
+        f"<div class='metric-card'>{_style_metric_label('최고 매출')}<div class='metric-value'>{kpis['max_sales']:,.1f} {unit_name}</div></div>",
+        f"<div class='metric-card'>{_style_metric_label('평균 매출')}<div class='metric-value'>{kpis['avg_sales']:,.1f} {unit_name}</div></div>",
+        f"<div class='metric-card'>{_style_metric_label('평균 증감률')}<div class='metric-value'><span class='{delta_cls}'>{kpis['avg_rate']:.1f}%</span></div></div>",
+        f"<div class='metric-card'>{_style_metric_label('누적/목표')}<div class='metric-value'>{kpis['cum_last']:,.1f} / {kpis['goal']:,.1f} {unit_name} <span class='{color_cls}' style='font-size:16px;'>({attain_rate:.1f}%)</span></div></div>",
     )
+    return f"<div class='metric-row'>{''.join(cards)}</div>"
+
+# 목표 환산값은 렌더 전에 1회 계산해 KPI·차트 빌더에 인자로 전달
+goal_scaled = goal / unit_div
+monthly_target = goal_scaled / max(len(df), 1) if goal > 0 else None
+
+# 4개 카드를 st.columns 대신 단일 markdown 요소로 전송
+st.markdown(render_kpi_html(compute_kpis(df, unit_div, goal_scaled), unit_name), unsafe_allow_html=True)
 
 # ----------------------------------------------------
 # 4) 공통 레이아웃 옵션
 # ----------------------------------------------------
+# 불변 부분은 rerun마다 1회만 생성해 모든 차트가 공유 (차트 호출별 재생성 없음).
+# Streamlit은 매 rerun마다 스크립트 전체를 다시 실행하므로 프로세스 수명 동안 1회는 아님.
+# 내부 dict는 공유 참조이며 Plotly가 update 시 복사
+_CANVAS_LAYOUT = dict(
+    margin=dict(t=50, r=20, b=50, l=60),
+    paper_bgcolor=COLORS["canvas"],
+    plot_bgcolor=COLORS["canvas"],
+    font=dict(color=COLORS["neutral_text"]),
+)
+_BASE_LAYOUT = dict(
+    _CANVAS_LAYOUT,
+    xaxis=dict(title="월", tickangle=-45, showgrid=False),
+    legend=dict(bgcolor=COLORS["card_bg"], bordercolor="#E3E8EF"),
+)
+
+# 호버 템플릿: rerun마다 단위별로 1회 생성해 모든 트레이스가 공유
+HOVER_MONEY = {div: f"%{{x}}<br>%{{y:,.0f}} {name}<extra></extra>" for div, name in unit_label_map.items()}
+HOVER_PCT = "%{x}<br>%{y:.1f}%<extra></extra>"
+
 def layout_xy(y_title):
-    return dict(
-        margin=dict(t=50, r=20, b=50, l=60),
-        xaxis=dict(title="월", tickangle=-45, showgrid=False),
-        yaxis=dict(title=y_title, gridcolor=COLORS["grid"], zerolinecolor=COLORS["grid"]),
-        paper_bgcolor=COLORS["canvas"],
-        plot_bgcolor=COLORS["canvas"],
-        font=dict(color=COLORS["neutral_text"]),
-        legend=dict(bgcolor=COLORS["card_bg"], bordercolor="#E3E8EF"),
-    )
+    return {**_BASE_LAYOUT, "yaxis": {"title": y_title, "gridcolor": COLORS["grid"], "zerolinecolor": COLORS["grid"]}}
+
+def _text_labels(series, fmt, show_labels):
+    # 라벨 off면 빈 문자열 N개를 만들지 않고 None 전달
+    if not show_labels:
+        return None
+    return series.map(fmt.format).to_numpy()
 
 def download_png(fig, name, key):
     with st.popover("PNG 저장", use_container_width=False):
@@ -178,150 +295,219 @@ def download_png(fig, name, key):
                 st.warning(f"kaleido가 필요합니다. 오류: {e}")
 
 # ----------------------------------------------------
-# 5) 차트들
+# 5) 차트들 (입력이 같으면 Figure 재사용)
 # ----------------------------------------------------
-def chart_line_sales_vs_prev():
+# 각 *_parts 함수는 (traces, layout, hlines)를 반환 → 단일 Figure / 2x2 개요 Figure 양쪽에서 재사용
+_DF_HASH = {pd.DataFrame: lambda d: pd.util.hash_pandas_object(d, index=True).values.tobytes()}
+# cache_resource는 같은 Figure 객체를 모든 세션에 공유 → 호출부(plotly_chart, download_png)는 읽기만 할 것.
+# 목표값 입력마다 키가 늘어나므로 함수별 항목 수 상한을 둠
+_FIG_CACHE = dict(hash_funcs=_DF_HASH, max_entries=32, show_spinner=False)
+
+def _line_sales_parts(df, unit_div, show_labels, use_brand_primary, monthly_target):
+    unit_name = unit_label_map[unit_div]
     line_color = COLORS["brand_primary"] if use_brand_primary else COLORS["primary"]
 
     # 최대/최소 포인트
-    max_idx = int(df["매출액"].idxmax())
-    min_idx = int(df["매출액"].idxmin())
-
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=df["월"], y=df["매출액_단위"],
-        mode="lines+markers+text" if show_labels else "lines+markers",
-        name="당해 매출",
-        line=dict(color=line_color, width=3),
-        marker=dict(symbol="circle", size=7, color=line_color),
-        text=[f"{v:,.0f}" if show_labels else "" for v in df["매출액_단위"]],
-        textposition="top center",
-        hovertemplate="%{x}<br>%{y:,.0f} " + unit_name + "<extra></extra>"
-    ))
-    fig.add_trace(go.Scatter(
-        x=df["월"], y=df["전년동월_단위"],
-        mode="lines+markers+text" if show_labels else "lines+markers",
-        name="전년동월",
-        line=dict(color=COLORS["secondary"], width=2, dash="dot"),
-        marker=dict(symbol="triangle-up", size=7, color=COLORS["secondary"]),
-        text=[f'{v:,.0f}' if show_labels else "" for v in df["전년동월_단위"]],
-        textposition="top center",
-        hovertemplate="%{x}<br>%{y:,.0f} " + unit_name + "<extra></extra>"
-    ))
+    stats = _sales_stats(df)
+    max_idx, min_idx = stats["argmax"], stats["argmin"]
+
+    traces = [
+        go.Scatter(
+            x=df["월"], y=df["매출액_단위"],
+            mode="lines+markers+text" if show_labels else "lines+markers",
+            name="당해 매출",
+            line=dict(color=line_color, width=3),
+            marker=dict(symbol="circle", size=7, color=line_color),
+            text=_text_labels(df["매출액_단위"], "{:,.0f}", show_labels),
+            textposition="top center",
+            hovertemplate=HOVER_MONEY[unit_div]
+        ),
+        go.Scatter(
+            x=df["월"], y=df["전년동월_단위"],
+            mode="lines+markers+text" if show_labels else "lines+markers",
+            name="전년동월",
+            line=dict(color=COLORS["secondary"], width=2, dash="dot"),
+            marker=dict(symbol="triangle-up", size=7, color=COLORS["secondary"]),
+            text=_text_labels(df["전년동월_단위"], "{:,.0f}", show_labels),
+            textposition="top center",
+            hovertemplate=HOVER_MONEY[unit_div]
+        ),
+        # 최대/최소 강조
+        go.Scatter(
+            x=[df["월"].iat[max_idx]], y=[df["매출액_단위"].iat[max_idx]],
+            mode="markers+text", name="최대",
+            marker=dict(size=16, symbol="star", color=COLORS["canvas"],
+                        line=dict(color=line_color, width=2)),
+            text=["최대"], textposition="bottom center",
+            hovertemplate=f"%{{x}}<br>최대: %{{y:,.0f}} {unit_name}<extra></extra>"
+        ),
+        go.Scatter(
+            x=[df["월"].iat[min_idx]], y=[df["매출액_단위"].iat[min_idx]],
+            mode="markers+text", name="최소",
+            marker=dict(size=14, symbol="x", color=COLORS["critical"]),
+            text=["최소"], textposition="bottom center",
+            hovertemplate=f"%{{x}}<br>최소: %{{y:,.0f}} {unit_name}<extra></extra>"
+        ),
+    ]
     # 월평균 목표선
-    if goal and goal > 0:
-        monthly_target = (goal / max(len(df), 1)) / unit_div
-        fig.add_hline(y=monthly_target, line=dict(color=COLORS["grid"], dash="dash"),
-                      annotation_text="월평균 목표", annotation_position="top left")
-
-    # 최대/최소 강조
-    fig.add_trace(go.Scatter(
-        x=[df.loc[max_idx, "월"]], y=[df.loc[max_idx, "매출액_단위"]],
-        mode="markers+text", name="최대",
-        marker=dict(size=16, symbol="star", color=COLORS["canvas"],
-                    line=dict(color=line_color, width=2)),
-        text=["최대"], textposition="bottom center",
-        hovertemplate="%{x}<br>최대: %{y:,.0f} " + unit_name + "<extra></extra>"
-    ))
-    fig.add_trace(go.Scatter(
-        x=[df.loc[min_idx, "월"]], y=[df.loc[min_idx, "매출액_단위"]],
-        mode="markers+text", name="최소",
-        marker=dict(size=14, symbol="x", color=COLORS["critical"]),
-        text=["최소"], textposition="bottom center",
-        hovertemplate="%{x}<br>최소: %{y:,.0f} " + unit_name + "<extra></extra>"
-    ))
-
-    fig.update_layout(title=f"월별 매출 vs 전년동월 · 단위: {unit_name}", **layout_xy(f"매출액({unit_name})"))
-    return fig
-
-def chart_bar_rate():
-    colors = [COLORS["positive"] if v >= 0 else COLORS["critical"] for v in df["증감률"]]
-    patterns = ["" if v >= 0 else "/" for v in df["증감률"]]
-    fig = go.Figure(go.Bar(
+    hlines = []
+    if monthly_target is not None:
+        hlines.append(dict(y=monthly_target, line=dict(color=COLORS["grid"], dash="dash"),
+                           annotation_text="월평균 목표", annotation_position="top left"))
+
+    layout = dict(title=f"월별 매출 vs 전년동월 · 단위: {unit_name}", **layout_xy(f"매출액({unit_name})"))
+    return traces, layout, hlines
+
+def _bar_rate_parts(df, show_labels):
+    mask = df["증감률"].to_numpy() >= 0
+    colors = np.where(mask, COLORS["positive"], COLORS["critical"])
+    patterns = np.where(mask, "", "/")
+    traces = [go.Bar(
         x=df["월"], y=df["증감률"],
+        name="증감률",
         marker=dict(color=colors, pattern=dict(shape=patterns), line=dict(color="#FFFFFF", width=0.5)),
-        text=[f"{v:.1f}%" if show_labels else "" for v in df["증감률"]],
+        text=_text_labels(df["증감률"], "{:.1f}%", show_labels),
         textposition="outside",
-        hovertemplate="%{x}<br>%{y:.1f}%<extra></extra>"
-    ))
-    fig.update_layout(title="월별 증감률(%)", **layout_xy("증감률(%)"))
-    return fig
-
-def chart_cum_with_goal():
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(
+        hovertemplate=HOVER_PCT
+    )]
+    layout = dict(title="월별 증감률(%)", **layout_xy("증감률(%)"))
+    return traces, layout, []
+
+def _cum_goal_parts(df, unit_div, show_labels, goal_scaled):
+    unit_name = unit_label_map[unit_div]
+    traces = [go.Scatter(
         x=df["월"], y=df["누적매출_단위"],
         mode="lines+markers+text" if show_labels else "lines+markers",
         name="누적 매출",
         line=dict(color=COLORS["sky"], width=3),
         marker=dict(symbol="diamond", size=7, color=COLORS["sky"]),
-        text=[f"{v:,.0f}" if show_labels else "" for v in df["누적매출_단위"]],
+        text=_text_labels(df["누적매출_단위"], "{:,.0f}", show_labels),
         textposition="top center",
-        hovertemplate="%{x}<br>%{y:,.0f} " + unit_name + "<extra></extra>"
-    ))
-    if goal and goal > 0:
-        fig.add_hline(y=goal / unit_div, line=dict(color="#7A7C88", dash="dot"),
-                      annotation_text=f"연간 목표 {goal/unit_div:,.0f} {unit_name}",
-                      annotation_position="top left")
-    fig.update_layout(title=f"누적 매출 추이 · 단위: {unit_name}", **layout_xy(f"누적 매출({unit_name})"))
-    return fig
-
-def chart_heatmap_sales():
+        hovertemplate=HOVER_MONEY[unit_div]
+    )]
+    hlines = []
+    if goal_scaled > 0:
+        hlines.append(dict(y=goal_scaled, line=dict(color="#7A7C88", dash="dot"),
+                           annotation_text=f"연간 목표 {goal_scaled:,.0f} {unit_name}",
+                           annotation_position="top left"))
+    layout = dict(title=f"누적 매출 추이 · 단위: {unit_name}", **layout_xy(f"누적 매출({unit_name})"))
+    return traces, layout, hlines
+
+def _heatmap_parts(df, unit_div):
+    unit_name = unit_label_map[unit_div]
     # 연-월 피벗 히트맵 (단일계열 파랑)
-    tmp = df.copy()
-    # YYYY-MM 가정 → 연/월 분리
-    tmp["연"] = tmp["월"].str.slice(0,4)
-    tmp["월번호"] = tmp["월"].str.slice(5,7)
-    pivot = tmp.pivot_table(index="연", columns="월번호", values="매출액_단위", aggfunc="sum")
-    # 월 라벨
-    columns_sorted = sorted(pivot.columns.tolist())
-    z_vals = pivot[columns_sorted].values if len(pivot.columns) else pivot.values
-
-    fig = go.Figure(data=go.Heatmap(
-        z=z_vals,
-        x=[f"{m}월" for m in columns_sorted] if len(columns_sorted) else pivot.columns,
+    # 연/월번호는 로드 시 정수로 파싱됨 → groupby 정렬(C 경로)로 행/열이 숫자 순 (Python sorted 불필요)
+    # 월 형식이 YYYY-MM이 아닌 행(<NA>)은 히트맵에서만 제외
+    valid = df["연"].notna() & df["월번호"].notna()
+    pivot = df[valid].groupby(["연", "월번호"], sort=True)["매출액_단위"].sum().unstack("월번호", fill_value=np.nan)
+
+    traces = [go.Heatmap(
+        z=pivot.values,
+        x=[f"{m:02d}월" for m in pivot.columns],
         y=[str(y) for y in pivot.index],
         colorscale=[[0, "#E8F3FC"], [1, COLORS["primary"]]],  # 단일 파랑 계열
         colorbar=dict(title=f"{unit_name}"),
         zsmooth=False, showscale=True,
         hoverongaps=False
-    ))
-    fig.update_layout(title=f"월별 매출 히트맵 (단위: {unit_name})",
-                      margin=dict(t=50, r=20, b=50, l=60),
-                      paper_bgcolor=COLORS["canvas"],
-                      plot_bgcolor=COLORS["canvas"],
-                      font=dict(color=COLORS["neutral_text"]))
+    )]
+    layout = dict(title=f"월별 매출 히트맵 (단위: {unit_name})", **_CANVAS_LAYOUT)
+    return traces, layout, []
+
+def _to_figure(traces, layout, hlines):
+    fig = go.Figure(data=traces)
+    for h in hlines:
+        fig.add_hline(**h)
+    fig.update_layout(**layout)
+    return fig
+
+@st.cache_resource(**_FIG_CACHE)
+def chart_line_sales_vs_prev(df, unit_div, show_labels, use_brand_primary, monthly_target):
+    return _to_figure(*_line_sales_parts(df, unit_div, show_labels, use_brand_primary, monthly_target))
+
+@st.cache_resource(**_FIG_CACHE)
+def chart_bar_rate(df, show_labels):
+    return _to_figure(*_bar_rate_parts(df, show_labels))
+
+@st.cache_resource(**_FIG_CACHE)
+def chart_cum_with_goal(df, unit_div, show_labels, goal_scaled):
+    return _to_figure(*_cum_goal_parts(df, unit_div, show_labels, goal_scaled))
+
+@st.cache_resource(**_FIG_CACHE)
+def chart_heatmap_sales(df, unit_div):
+    return _to_figure(*_heatmap_parts(df, unit_div))
+
+# 셀 수가 이 값을 넘으면 z 행렬 JSON 대신 서버에서 렌더한 PNG 전송
+_HEATMAP_IMAGE_CELLS = 200
+
+@st.cache_data(hash_funcs=_DF_HASH, show_spinner=False)
+def heatmap_png(df, unit_div) -> bytes | None:
+    fig = chart_heatmap_sales(df, unit_div)
+    if np.size(fig.data[0].z) <= _HEATMAP_IMAGE_CELLS:
+        return None
+    try:
+        return fig.to_image(format="png", engine="kaleido", width=900, height=400)
+    except Exception:
+        return None  # kaleido 미설치 → 인터랙티브 차트로 표시
+
+@st.cache_resource(**_FIG_CACHE)
+def chart_overview(df, unit_div, show_labels, use_brand_primary, goal_scaled, monthly_target):
+    # '전체' 모드: 4개 차트를 2x2 하나의 Figure로 → 페이로드/Plotly.js 렌더 1회
+    parts = [
+        _line_sales_parts(df, unit_div, show_labels, use_brand_primary, monthly_target),
+        _bar_rate_parts(df, show_labels),
+        _cum_goal_parts(df, unit_div, show_labels, goal_scaled),
+        _heatmap_parts(df, unit_div),
+    ]
+    fig = make_subplots(rows=2, cols=2, subplot_titles=[layout["title"] for _, layout, _ in parts],
+                        horizontal_spacing=0.08, vertical_spacing=0.16)
+    for (traces, layout, hlines), (row, col) in zip(parts, [(1, 1), (1, 2), (2, 1), (2, 2)]):
+        for trace in traces:
+            fig.add_trace(trace, row=row, col=col)
+        for h in hlines:
+            fig.add_hline(row=row, col=col, **h)
+        if "xaxis" in layout:
+            fig.update_xaxes(layout["xaxis"], row=row, col=col)
+            fig.update_yaxes(layout["yaxis"], row=row, col=col)
+    # 히트맵 컬러바는 우하단 칸 높이에 맞춤 (범례와 겹치지 않도록)
+    fig.update_traces(colorbar=dict(len=0.42, y=0.21), selector=dict(type="heatmap"))
+    fig.update_layout(height=820, legend=_BASE_LAYOUT["legend"], **_CANVAS_LAYOUT)
     return fig
 
 # ----------------------------------------------------
 # 6) 렌더링
 # ----------------------------------------------------
-if focus in ("전체", "추세"):
+if focus == "전체":
+    fig0 = chart_overview(df, unit_div, show_labels, use_brand_primary, goal_scaled, monthly_target)
+    st.plotly_chart(fig0, use_container_width=True)
+    download_png(fig0, "overview", key="dl0")
+
+if focus == "추세":
     c1, c2 = st.columns((2, 1))
     with c1:
-        fig1 = chart_line_sales_vs_prev()
+        fig1 = chart_line_sales_vs_prev(df, unit_div, show_labels, use_brand_primary, monthly_target)
         st.plotly_chart(fig1, use_container_width=True)
         download_png(fig1, "line_sales_vs_prev", key="dl1")
-    if focus == "추세":
-        st.stop()
+    st.stop()
 
-if focus in ("전체", "증감률"):
-    fig2 = chart_bar_rate()
+if focus == "증감률":
+    fig2 = chart_bar_rate(df, show_labels)
     st.plotly_chart(fig2, use_container_width=True)
     download_png(fig2, "bar_rate", key="dl2")
-    if focus == "증감률":
-        st.stop()
+    st.stop()
 
-if focus in ("전체", "누적"):
-    fig3 = chart_cum_with_goal()
+if focus == "누적":
+    fig3 = chart_cum_with_goal(df, unit_div, show_labels, goal_scaled)
     st.plotly_chart(fig3, use_container_width=True)
     download_png(fig3, "cum_with_goal", key="dl3")
-    if focus == "누적":
-        st.stop()
+    st.stop()
 
-if focus in ("전체", "히트맵"):
-    fig4 = chart_heatmap_sales()
-    st.plotly_chart(fig4, use_container_width=True)
+if focus == "히트맵":
+    fig4 = chart_heatmap_sales(df, unit_div)
+    png = heatmap_png(df, unit_div)
+    if png is not None:
+        st.image(png)
+    else:
+        st.plotly_chart(fig4, use_container_width=True)
     download_png(fig4, "heatmap_sales", key="dl4")
 
 # ----------------------------------------------------